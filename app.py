@@ -1,11 +1,24 @@
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
+from flask.json.provider import JSONProvider
 from apscheduler.schedulers.background import BackgroundScheduler
+from werkzeug.http import is_resource_modified
 import atexit
+import hashlib
+import orjson
 import os
+from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows — no cross-process refresh lock
+    fcntl = None
+
 import db
-from fetcher import fetch_all_feeds, fetch_github_repos, fetch_arxiv_papers, fetch_tavily_sites, preview_feed
+from fetcher import (
+    collect_arxiv_papers, collect_feed_articles, collect_github_repos, collect_tavily_sites,
+    fetch_tavily_sites, preview_feed,
+)
 
 # Load .env if it exists (no extra dependency needed)
 _env_file = Path(__file__).parent / ".env"
@@ -16,21 +29,127 @@ if _env_file.exists():
             k, _, v = line.partition("=")
             os.environ.setdefault(k.strip(), v.strip())
 
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson — used by every jsonify() call."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the str round-trip — orjson already produces UTF-8 bytes
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # ---------------------------------------------------------------------------
 # Background scheduler — RSS every 30 min, GitHub every 2 hours
 # ---------------------------------------------------------------------------
-def _refresh_all():
-    fetch_all_feeds()
-    fetch_github_repos()
-    fetch_arxiv_papers()
-    fetch_tavily_sites()
-
+# Lock files live next to the database they protect. Under gunicorn only
+# the worker holding the scheduler lock runs the 30-min job; the refresh
+# lock stops a manual /api/refresh from overlapping a running refresh.
+_SCHEDULER_LOCK = f"{db.DB_PATH}.scheduler.lock"
+_REFRESH_LOCK = f"{db.DB_PATH}.refresh.lock"
+
+
+def _try_lock(path: str):
+    """Take a non-blocking exclusive flock on `path`.
+
+    Returns the open file (the lock lasts until it is closed), or None if
+    another process holds it.
+    """
+    # "a" — never truncate the file, whatever it is
+    lock_file = open(path, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+    return lock_file
+
+
+def _refresh_all() -> int | None:
+    """Run a refresh; return the number of new articles, or None if skipped."""
+    lock_file = _try_lock(_REFRESH_LOCK)
+    if lock_file is None:
+        print("[app] Refresh already running in another worker — skipping.")
+        return None
+    with lock_file:
+        return _refresh_locked()
+
+
+def _refresh_locked() -> int:
+    # Collect everything first so the write transaction is not held open
+    # across network requests, then insert all sources in a single commit.
+    # One connection serves every DB call of the refresh.
+    conn = db.get_conn()
+    try:
+        feed_columns, feed_validators = collect_feed_articles(conn)
+        batches = [
+            collect_github_repos(),
+            collect_arxiv_papers(),
+            collect_tavily_sites(conn=conn),
+        ]
+        with db.transaction(conn):
+            # Count what was actually stored — sources overlap (e.g. the same
+            # repo matching several GitHub queries) and repeats are dropped
+            # here rather than by the collectors.
+            stored = db.insert_article_rows(zip(*feed_columns), conn, feed_cache=feed_validators)
+            for batch in batches:
+                stored += db.insert_articles(batch, conn)
+    finally:
+        conn.close()
+    return stored
+
+# Held for the life of the process by whichever worker gets it first; when
+# that worker exits, its replacement picks the lock up on import.
+_scheduler_lock = _try_lock(_SCHEDULER_LOCK)
 scheduler = BackgroundScheduler(daemon=True)
-scheduler.add_job(_refresh_all, "interval", minutes=30, id="feed_refresh")
-scheduler.start()
-atexit.register(lambda: scheduler.shutdown(wait=False))
+if _scheduler_lock is not None:
+    scheduler.add_job(
+        _refresh_all, "interval", minutes=30, id="feed_refresh",
+        max_instances=1, coalesce=True,
+    )
+    scheduler.start()
+    atexit.register(lambda: scheduler.shutdown(wait=False))
+else:
+    print("[app] Another worker runs the refresh scheduler — not starting one here.")
+
+
+# ---------------------------------------------------------------------------
+# HTTP caching — answer unchanged API reads with 304 Not Modified
+# ---------------------------------------------------------------------------
+def _conditional(build, *key):
+    """Return build(stats) unless the client's cached copy is still current.
+
+    The ETag is derived from the article count and latest fetch time (plus
+    any extra `key` parts such as the search keyword), so it changes
+    whenever articles are inserted or deleted.
+    """
+    stats = db.get_stats()
+    etag = hashlib.md5(
+        "|".join(map(str, (*key, stats["total"], stats["last_fetched"]))).encode()
+    ).hexdigest()
+    last_modified = None
+    if stats["last_fetched"]:
+        last_modified = datetime.fromisoformat(stats["last_fetched"]).replace(tzinfo=timezone.utc)
+
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        resp = build(stats)
+    else:
+        resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.last_modified = last_modified
+    # Always revalidate — never let the browser reuse a copy heuristically
+    resp.cache_control.no_cache = True
+    return resp
 
 
 # ---------------------------------------------------------------------------
@@ -45,23 +164,31 @@ def index():
 @app.route("/api/articles")
 def api_articles():
     keyword = request.args.get("q", "").strip() or None
-    articles = db.get_articles(keyword=keyword)
-    return jsonify(articles)
+
+    def stream():
+        # {"cols": [...], "rows": [[...], ...]}, written row by row straight
+        # off the cursor
+        with db.stream_articles(keyword=keyword) as (cols, rows):
+            yield b'{"cols":' + orjson.dumps(cols) + b',"rows":['
+            for i, row in enumerate(rows):
+                yield orjson.dumps(row) if i == 0 else b"," + orjson.dumps(row)
+            yield b"]}"
+
+    return _conditional(lambda _: Response(stream(), mimetype="application/json"), keyword)
 
 
 @app.route("/api/refresh", methods=["POST"])
 def api_refresh():
-    rss_count = fetch_all_feeds()
-    gh_count = fetch_github_repos()
-    arxiv_count = fetch_arxiv_papers()
-    tavily_count = fetch_tavily_sites()
+    fetched = _refresh_all()
+    if fetched is None:
+        return jsonify({"skipped": True, "error": "A refresh is already running"}), 409
     stats = db.get_stats()
-    return jsonify({"fetched": rss_count + gh_count + arxiv_count + tavily_count, **stats})
+    return jsonify({"fetched": fetched, **stats})
 
 
 @app.route("/api/status")
 def api_status():
-    return jsonify(db.get_stats())
+    return _conditional(jsonify)
 
 
 # ---------------------------------------------------------------------------
@@ -109,10 +236,10 @@ def api_add_feed():
     except Exception as exc:
         return jsonify({"error": f"Feed already exists or DB error: {exc}"}), 409
 
-    # Immediately fetch articles from the new feed
-    from fetcher import insert_articles, _clean_html, _parse_date
-    import feedparser as _fp
-    parsed = _fp.parse(url)
+    # Immediately fetch articles from the new feed — reuses the feed that
+    # preview_feed just downloaded instead of fetching it again
+    from fetcher import insert_articles, _cached_parse, _clean_html, _parse_date
+    parsed = _cached_parse(url)
     articles = []
     for entry in parsed.entries:
         title = _clean_html(getattr(entry, "title", ""))
@@ -193,9 +320,6 @@ def api_delete_site(site_id):
 if __name__ == "__main__":
     db.init_db()
     print("[app] Running initial feed fetch…")
-    fetch_all_feeds()
-    fetch_github_repos()
-    fetch_arxiv_papers()
-    fetch_tavily_sites()
+    _refresh_all()
     print("[app] Starting Flask on http://localhost:5000")
     app.run(debug=False, port=5000)
@@ -1,17 +1,53 @@
 import sqlite3
+from collections.abc import Iterable
+from contextlib import contextmanager, nullcontext
+from itertools import chain
 from datetime import datetime
 
 DB_PATH = "articles.db"
 
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
+    # Autocommit mode — write paths that need batching issue BEGIN/COMMIT
+    # themselves instead of relying on sqlite3's implicit transactions.
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    # Per-connection settings — journal_mode=WAL is persisted by init_db()
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
-def init_db():
-    with get_conn() as conn:
+def _use_conn(conn: sqlite3.Connection | None):
+    """Reuse the caller's connection when one is passed, else open a new one."""
+    return nullcontext(conn) if conn is not None else get_conn()
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection):
+    """Group the enclosed writes into one BEGIN IMMEDIATE … COMMIT (one fsync).
+
+    Nested uses join the transaction that is already open on `conn`.
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def init_db(conn: sqlite3.Connection | None = None):
+    with _use_conn(conn) as conn:
+        # WAL lets readers proceed while a refresh is writing; it is stored
+        # in the database file, so setting it once at startup is enough.
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS articles (
                 id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -24,6 +60,44 @@ def init_db():
                 fetched_at  TEXT DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Matches the ORDER BY in _articles_cursor, so LIMIT reads just the index
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_articles_pub "
+            "ON articles(published DESC, fetched_at DESC)"
+        )
+        # Full-text index over title/summary for keyword search, kept in
+        # sync with `articles` by triggers (external-content table).
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'"
+        ).fetchone()
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, summary, content='articles', content_rowid='id'
+            )
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+            END
+        """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, summary)
+                VALUES ('delete', old.id, old.title, old.summary);
+                INSERT INTO articles_fts(rowid, title, summary)
+                VALUES (new.id, new.title, new.summary);
+            END
+        """)
+        if not fts_exists:
+            # Index articles stored before the FTS table existed
+            conn.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS custom_feeds (
                 id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -43,110 +117,221 @@ def init_db():
                 added_at    TEXT DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        conn.commit()
+        # HTTP validators from each feed's last 200 response (conditional GET)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS feed_cache (
+                url         TEXT PRIMARY KEY,
+                etag        TEXT,
+                modified    TEXT
+            )
+        """)
 
 
-def get_custom_feeds() -> list[dict]:
-    with get_conn() as conn:
+def get_custom_feeds(conn: sqlite3.Connection | None = None) -> list[dict]:
+    with _use_conn(conn) as conn:
         rows = conn.execute(
             "SELECT * FROM custom_feeds ORDER BY added_at DESC"
         ).fetchall()
     return [dict(r) for r in rows]
 
 
-def add_custom_feed(name: str, url: str, category: str) -> int:
-    with get_conn() as conn:
+def add_custom_feed(
+    name: str,
+    url: str,
+    category: str,
+    conn: sqlite3.Connection | None = None,
+) -> int:
+    with _use_conn(conn) as conn:
         cursor = conn.execute(
             "INSERT INTO custom_feeds (name, url, category) VALUES (?, ?, ?)",
             (name, url, category),
         )
-        conn.commit()
         return cursor.lastrowid
 
 
-def delete_custom_feed(feed_id: int):
-    with get_conn() as conn:
+def delete_custom_feed(feed_id: int, conn: sqlite3.Connection | None = None):
+    with _use_conn(conn) as conn, transaction(conn):
         # Fetch name first so we can clean up its articles
         feed = conn.execute(
-            "SELECT name FROM custom_feeds WHERE id = ?", (feed_id,)
+            "SELECT name, url FROM custom_feeds WHERE id = ?", (feed_id,)
         ).fetchone()
         conn.execute("DELETE FROM custom_feeds WHERE id = ?", (feed_id,))
         if feed:
             conn.execute("DELETE FROM articles WHERE source = ?", (feed["name"],))
-        conn.commit()
+            # Forget validators so re-adding the feed fetches it in full
+            conn.execute("DELETE FROM feed_cache WHERE url = ?", (feed["url"],))
+
 
+def get_feed_cache(
+    conn: sqlite3.Connection | None = None,
+) -> dict[str, tuple[str | None, str | None]]:
+    """Return {url: (etag, modified)} for every feed fetched so far."""
+    with _use_conn(conn) as conn:
+        rows = conn.execute("SELECT url, etag, modified FROM feed_cache").fetchall()
+    return {r["url"]: (r["etag"], r["modified"]) for r in rows}
 
-def get_scraped_sites() -> list[dict]:
-    with get_conn() as conn:
+
+def save_feed_cache(
+    entries: Iterable[tuple[str, str | None, str | None]],
+    conn: sqlite3.Connection | None = None,
+):
+    """Upsert (url, etag, modified) validators after successful fetches."""
+    with _use_conn(conn) as conn, transaction(conn):
+        conn.executemany(
+            "INSERT OR REPLACE INTO feed_cache (url, etag, modified) VALUES (?, ?, ?)",
+            entries,
+        )
+
+
+def get_scraped_sites(conn: sqlite3.Connection | None = None) -> list[dict]:
+    with _use_conn(conn) as conn:
         rows = conn.execute(
             "SELECT * FROM scraped_sites ORDER BY added_at DESC"
         ).fetchall()
     return [dict(r) for r in rows]
 
 
-def add_scraped_site(name: str, url: str, category: str, query: str = "") -> int:
-    with get_conn() as conn:
+def add_scraped_site(
+    name: str,
+    url: str,
+    category: str,
+    query: str = "",
+    conn: sqlite3.Connection | None = None,
+) -> int:
+    with _use_conn(conn) as conn:
         cursor = conn.execute(
             "INSERT INTO scraped_sites (name, url, category, query) VALUES (?, ?, ?, ?)",
             (name, url, category, query),
         )
-        conn.commit()
         return cursor.lastrowid
 
 
-def delete_scraped_site(site_id: int):
-    with get_conn() as conn:
+def delete_scraped_site(site_id: int, conn: sqlite3.Connection | None = None):
+    with _use_conn(conn) as conn, transaction(conn):
         site = conn.execute(
             "SELECT name FROM scraped_sites WHERE id = ?", (site_id,)
         ).fetchone()
         conn.execute("DELETE FROM scraped_sites WHERE id = ?", (site_id,))
         if site:
             conn.execute("DELETE FROM articles WHERE source = ?", (site["name"],))
-        conn.commit()
 
 
-def insert_articles(articles: list[dict]):
-    with get_conn() as conn:
-        conn.executemany(
+_ARTICLE_COLUMNS = ("title", "url", "source", "category", "summary", "published")
+# OR IGNORE is a backstop: URLs are deduplicated in Python first, and a row
+# that breaks a constraint (e.g. a NULL title) is skipped rather than
+# rolling back the whole refresh.
+_INSERT_ARTICLE_SQL = f"INSERT OR IGNORE INTO articles ({', '.join(_ARTICLE_COLUMNS)}) VALUES "
+# Stay well below SQLite's bound-variable limit (999 on older builds)
+_URL_LOOKUP_CHUNK = 900
+_INSERT_CHUNK = 50
+
+
+def _existing_urls(conn, urls: list[str]) -> set[str]:
+    """Return the subset of `urls` already stored in the articles table."""
+    existing = set()
+    for i in range(0, len(urls), _URL_LOOKUP_CHUNK):
+        chunk = urls[i:i + _URL_LOOKUP_CHUNK]
+        rows = conn.execute(
+            f"SELECT url FROM articles WHERE url IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        existing.update(row[0] for row in rows)
+    return existing
+
+
+def insert_articles(articles: Iterable[dict], conn: sqlite3.Connection | None = None) -> int:
+    """Insert article dicts (keys as in `_ARTICLE_COLUMNS`); return rows stored."""
+    return insert_article_rows(
+        (tuple(a.get(col) for col in _ARTICLE_COLUMNS) for a in articles), conn
+    )
+
+
+def insert_article_rows(
+    rows: Iterable[tuple],
+    conn: sqlite3.Connection | None = None,
+    feed_cache: Iterable[tuple[str, str | None, str | None]] = (),
+) -> int:
+    """Insert `_ARTICLE_COLUMNS`-ordered tuples, skipping known URLs.
+
+    Also saves `feed_cache` validators; returns the number of rows stored.
+    """
+    placeholder = f"({', '.join('?' * len(_ARTICLE_COLUMNS))})"
+    with _use_conn(conn) as conn, transaction(conn):
+        rows = list(rows)
+        seen = _existing_urls(conn, [r[1] for r in rows])
+        new = []
+        inserted = 0
+        for r in rows:
+            if r[1] in seen:
+                continue
+            seen.add(r[1])
+            new.append(r)
+        for i in range(0, len(new), _INSERT_CHUNK):
+            chunk = new[i:i + _INSERT_CHUNK]
+            inserted += conn.execute(
+                _INSERT_ARTICLE_SQL + ", ".join([placeholder] * len(chunk)),
+                list(chain.from_iterable(chunk)),
+            ).rowcount
+        # Validators go in last, in the same transaction, so a failed insert
+        # never leaves a feed marked as fetched
+        save_feed_cache(feed_cache, conn)
+    return inserted
+
+
+def _fts_query(keyword: str) -> str:
+    """Quote user input as an FTS5 prefix phrase so operators stay literal."""
+    return '"' + keyword.replace('"', '""') + '"*'
+
+
+def _articles_cursor(
+    conn: sqlite3.Connection, keyword: str | None, limit: int
+) -> sqlite3.Cursor:
+    """Run the article listing query on a plain-tuple cursor."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    if keyword:
+        return cursor.execute(
             """
-            INSERT OR IGNORE INTO articles (title, url, source, category, summary, published)
-            VALUES (:title, :url, :source, :category, :summary, :published)
+            SELECT a.* FROM articles_fts f
+            JOIN articles a ON a.id = f.rowid
+            WHERE articles_fts MATCH ?
+            ORDER BY a.published DESC, a.fetched_at DESC
+            LIMIT ?
             """,
-            articles,
+            (_fts_query(keyword), limit),
         )
-        conn.commit()
-
-
-def get_articles(keyword: str | None = None, limit: int = 200) -> list[dict]:
-    with get_conn() as conn:
-        if keyword:
-            kw = f"%{keyword}%"
-            rows = conn.execute(
-                """
-                SELECT * FROM articles
-                WHERE title LIKE ? OR summary LIKE ?
-                ORDER BY published DESC, fetched_at DESC
-                LIMIT ?
-                """,
-                (kw, kw, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                """
-                SELECT * FROM articles
-                ORDER BY published DESC, fetched_at DESC
-                LIMIT ?
-                """,
-                (limit,),
-            ).fetchall()
-    return [dict(r) for r in rows]
+    return cursor.execute(
+        """
+        SELECT * FROM articles
+        ORDER BY published DESC, fetched_at DESC
+        LIMIT ?
+        """,
+        (limit,),
+    )
+
+
+@contextmanager
+def stream_articles(keyword: str | None = None, limit: int = 200):
+    """Yield ``(cols, rows)`` for matching articles, with rows read lazily.
+
+    Rows are plain tuples in `cols` order, read straight off the cursor. The
+    connection is closed when the ``with`` block exits, however it exits.
+    """
+    conn = get_conn()
+    try:
+        cursor = _articles_cursor(conn, keyword, limit)
+        yield [d[0] for d in cursor.description], cursor
+    finally:
+        conn.close()
 
 
-def get_stats() -> dict:
-    with get_conn() as conn:
+def get_stats(conn: sqlite3.Connection | None = None) -> dict:
+    with _use_conn(conn) as conn:
         count = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        # ids are AUTOINCREMENT and fetched_at defaults to insert time, so
+        # the newest row by rowid is the latest fetch — no table scan needed.
         latest = conn.execute(
-            "SELECT fetched_at FROM articles ORDER BY fetched_at DESC LIMIT 1"
+            "SELECT fetched_at FROM articles ORDER BY id DESC LIMIT 1"
         ).fetchone()
     return {
         "total": count,
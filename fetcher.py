@@ -1,15 +1,25 @@
+import asyncio
 import feedparser
+import gzip
 import html
-import json
+import httpx
 import os
 import re
+import sqlite3
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
 from time import mktime
 
-from db import insert_articles, get_custom_feeds, get_scraped_sites
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+
+from db import get_custom_feeds, get_feed_cache, get_scraped_sites, insert_articles
 from feeds import FEEDS
 
 # GitHub Search API queries — AI models and tools usable in / for games.
@@ -35,9 +45,18 @@ GITHUB_QUERIES = [
     ("AI game engine tools unity unreal",       "GitHub · Game Engines"),
 ]
 
+# Sources are independent and network-bound, so fetch them concurrently.
+_MAX_WORKERS = 16
+# Per-request socket timeout so one slow host can't stall a worker.
+_HTTP_TIMEOUT = 10
+_USER_AGENT = "AI-Gaming-RSS-Reader/1.0"
+
+_ARXIV_VERSION_RE = re.compile(r"v\d+$")
+
+
 def _github_headers() -> dict:
     headers = {
-        "User-Agent": "AI-Gaming-RSS-Reader/1.0",
+        "User-Agent": _USER_AGENT,
         "Accept": "application/vnd.github+json",
     }
     token = os.environ.get("GITHUB_TOKEN", "").strip()
@@ -48,29 +67,137 @@ def _github_headers() -> dict:
 
 def _clean_html(raw: str) -> str:
     """Strip HTML tags and decode entities from a string."""
-    text = re.sub(r"<[^>]+>", " ", raw or "")
-    text = html.unescape(text)
-    return " ".join(text.split())
+    raw = raw or ""
+    if "<" in raw:
+        # The parser decodes entities itself
+        text = LexborHTMLParser(raw).text(separator=" ", strip=True)
+        return " ".join(text.split())
+    return " ".join(html.unescape(raw).split())
+
+
+def _iso_date(text: str | None) -> str | None:
+    """Normalize an ISO-8601 timestamp string, or return None if it isn't one.
+
+    Offsets are converted to naive UTC, the same format the struct_time path
+    writes, so `published` keeps sorting correctly as a string.
+    """
+    if not text:
+        return None
+    try:
+        dt = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
 
 
 def _parse_date(entry) -> str | None:
     """Return an ISO date string from a feedparser entry, or None."""
-    if hasattr(entry, "published_parsed") and entry.published_parsed:
-        return datetime.fromtimestamp(mktime(entry.published_parsed)).isoformat()
-    if hasattr(entry, "updated_parsed") and entry.updated_parsed:
-        return datetime.fromtimestamp(mktime(entry.updated_parsed)).isoformat()
+    # Prefer the publish date over the last-updated one. For each, use the
+    # raw ISO-8601 string when the feed has one (Atom) and only fall back to
+    # feedparser's struct_time (via mktime) for other formats.
+    for field in ("published", "updated"):
+        iso = _iso_date(getattr(entry, field, None))
+        if iso:
+            return iso
+        parsed = getattr(entry, f"{field}_parsed", None)
+        if parsed:
+            return datetime.fromtimestamp(mktime(parsed)).isoformat()
     return None
 
 
-def _matches_filter(text: str, keywords: list[str]) -> bool:
+def _parse_feed(url: str, etag: str | None = None, modified: str | None = None):
+    """Download a feed with a timeout and hand the body to feedparser.
+
+    When `etag`/`modified` are given the request is conditional; an unchanged
+    feed comes back as an empty result with ``status == 304``. Like
+    feedparser's own HTTP handling, the result carries ``status``, ``etag``
+    and ``modified`` so callers can store the new validators.
+    """
+    headers = {"User-Agent": _USER_AGENT, "Accept-Encoding": "gzip"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=_HTTP_TIMEOUT) as resp:
+            data = resp.read()
+            status = resp.status
+            # feedparser only looks up lowercase header names
+            response_headers = {k.lower(): v for k, v in resp.headers.items()}
+            # urllib doesn't decode transfer compression, so undo gzip here
+            if response_headers.pop("content-encoding", "").lower() == "gzip":
+                data = gzip.decompress(data)
+            # Lets feedparser resolve relative links against the final URL
+            response_headers["content-location"] = resp.url
+    except urllib.error.HTTPError as exc:
+        if exc.code != 304:
+            raise
+        return feedparser.FeedParserDict(
+            status=304, etag=etag, modified=modified,
+            bozo=False, entries=[], feed=feedparser.FeedParserDict(),
+        )
+    # _clean_html strips all markup afterwards, so skip feedparser's own
+    # per-entry sanitizing and relative-URI rewriting of HTML content.
+    parsed = feedparser.parse(
+        data,
+        response_headers=response_headers,
+        resolve_relative_uris=False,
+        sanitize_html=False,
+    )
+    parsed["status"] = status
+    parsed["etag"] = resp.headers.get("ETag")
+    parsed["modified"] = resp.headers.get("Last-Modified")
+    return parsed
+
+
+def _store(articles: list[dict]) -> int:
+    """Insert a collected batch into the DB and return how many rows were new."""
+    return insert_articles(articles) if articles else 0
+
+
+def _compile_keywords(keywords: list[str]) -> re.Pattern | None:
+    """Build one case-insensitive pattern matching any of the keywords."""
+    if not keywords:
+        return None
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
+def _matches_filter(text: str, pattern: re.Pattern) -> bool:
     """Return True if text contains at least one keyword (case-insensitive)."""
-    lower = text.lower()
-    return any(kw.lower() in lower for kw in keywords)
+    return pattern.search(text) is not None
+
+
+# Short-lived cache of parsed feeds for the add-feed flow: the UI previews a
+# URL and then adds it, which would otherwise download the feed twice.
+_PARSE_CACHE_TTL = 60
+_PARSE_CACHE_MAX = 128
+_parse_cache: dict[str, tuple[float, feedparser.FeedParserDict]] = {}
+_parse_cache_lock = threading.Lock()
+
+
+def _cached_parse(url: str):
+    """Like `_parse_feed`, but reuse a result fetched in the last 60 s."""
+    now = time.monotonic()
+    with _parse_cache_lock:
+        hit = _parse_cache.get(url)
+        if hit and now - hit[0] < _PARSE_CACHE_TTL:
+            return hit[1]
+    parsed = _parse_feed(url)
+    with _parse_cache_lock:
+        for key in [k for k, (ts, _) in _parse_cache.items() if now - ts >= _PARSE_CACHE_TTL]:
+            del _parse_cache[key]
+        if len(_parse_cache) >= _PARSE_CACHE_MAX:
+            del _parse_cache[min(_parse_cache, key=lambda k: _parse_cache[k][0])]
+        _parse_cache[url] = (now, parsed)
+    return parsed
 
 
 def preview_feed(url: str) -> dict:
     """Fetch a feed URL and return its title and entry count (for validation)."""
-    parsed = feedparser.parse(url)
+    parsed = _cached_parse(url)
     if parsed.bozo and not parsed.entries:
         raise ValueError(parsed.bozo_exception or "Could not parse feed")
     return {
@@ -79,113 +206,158 @@ def preview_feed(url: str) -> dict:
     }
 
 
-def fetch_all_feeds() -> int:
-    """Fetch built-in + user-added feeds, insert new articles into DB."""
-    articles = []
+def _fetch_feed_articles(feed: dict, etag: str | None, modified: str | None):
+    """Fetch a single feed and return its (filtered) articles.
+
+    Returns ``(columns, validators)``. `columns` holds the articles as six
+    parallel lists — titles, urls, sources, categories, summaries,
+    published — rather than one dict per article. `validators` is the
+    ``(url, etag, modified)`` row to cache, or None if the feed was
+    unchanged (HTTP 304) or could not be fetched.
+    """
+    titles, urls, sources, cats, summaries, pubs = columns = ([], [], [], [], [], [])
+    validators = None
+    filter_re = _compile_keywords(feed.get("filter_keywords", []))
+    try:
+        parsed = _parse_feed(feed["url"], etag, modified)
+        if parsed.status == 304:
+            return columns, validators
+        for entry in parsed.entries:
+            title = _clean_html(getattr(entry, "title", ""))
+            url = getattr(entry, "link", "")
+            if not title or not url:
+                continue
+
+            # Prefer content > summary > description for the excerpt
+            summary_raw = ""
+            if hasattr(entry, "content") and entry.content:
+                summary_raw = entry.content[0].get("value", "")
+            elif hasattr(entry, "summary"):
+                summary_raw = entry.summary
+            elif hasattr(entry, "description"):
+                summary_raw = entry.description
+
+            summary = _clean_html(summary_raw)[:500]
+
+            # Apply keyword filter for Tier-2 feeds
+            if filter_re and not _matches_filter(title + " " + summary, filter_re):
+                continue
+
+            titles.append(title)
+            urls.append(url)
+            sources.append(feed["name"])
+            cats.append(feed["category"])
+            summaries.append(summary)
+            pubs.append(_parse_date(entry))
+        if parsed.etag or parsed.modified:
+            validators = (feed["url"], parsed.etag, parsed.modified)
+    except Exception as exc:
+        print(f"[fetcher] Error fetching {feed['name']}: {exc}")
+    return columns, validators
+
+
+def collect_feed_articles(
+    conn: sqlite3.Connection | None = None,
+) -> tuple[tuple[list, ...], list[tuple]]:
+    """Fetch built-in + user-added feeds and return ``(columns, validators)``.
+
+    See `_fetch_feed_articles` for both parts. Nothing is written here —
+    pass the validators to `insert_article_rows(feed_cache=...)`, so the new
+    ETag/Last-Modified values are only saved once the articles they cover
+    are stored.
+    """
+    custom = get_custom_feeds(conn)
     all_feeds = list(FEEDS) + [
         {"name": f["name"], "url": f["url"], "category": f["category"]}
-        for f in get_custom_feeds()
+        for f in custom
     ]
-    for feed in all_feeds:
-        filter_kw: list[str] = feed.get("filter_keywords", [])
-        try:
-            parsed = feedparser.parse(feed["url"])
-            for entry in parsed.entries:
-                title = _clean_html(getattr(entry, "title", ""))
-                url = getattr(entry, "link", "")
-                if not title or not url:
-                    continue
+    cache = get_feed_cache(conn)
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as ex:
+        results = list(ex.map(
+            lambda f: _fetch_feed_articles(f, *cache.get(f["url"], (None, None))),
+            all_feeds,
+        ))
+    columns = ([], [], [], [], [], [])
+    for feed_columns, _ in results:
+        for col, values in zip(columns, feed_columns):
+            col.extend(values)
+    validators = [v for _, v in results if v]
 
-                # Prefer content > summary > description for the excerpt
-                summary_raw = ""
-                if hasattr(entry, "content") and entry.content:
-                    summary_raw = entry.content[0].get("value", "")
-                elif hasattr(entry, "summary"):
-                    summary_raw = entry.summary
-                elif hasattr(entry, "description"):
-                    summary_raw = entry.description
+    print(f"[fetcher] Processed {len(columns[0])} articles across {len(all_feeds)} feeds ({len(custom)} custom).")
+    return columns, validators
 
-                summary = _clean_html(summary_raw)[:500]
 
-                # Apply keyword filter for Tier-2 feeds
-                if filter_kw and not _matches_filter(title + " " + summary, filter_kw):
-                    continue
+_GITHUB_SEARCH_URL = "https://api.github.com/search/repositories"
 
-                articles.append(
-                    {
-                        "title": title,
-                        "url": url,
-                        "source": feed["name"],
-                        "category": feed["category"],
-                        "summary": summary,
-                        "published": _parse_date(entry),
-                    }
-                )
-        except Exception as exc:
-            print(f"[fetcher] Error fetching {feed['name']}: {exc}")
 
-    if articles:
-        insert_articles(articles)
-
-    print(f"[fetcher] Processed {len(articles)} articles across {len(all_feeds)} feeds ({len(get_custom_feeds())} custom).")
-    return len(articles)
-
-
-def fetch_github_repos() -> int:
-    """Search GitHub for trending AI-in-gaming repos and insert into DB."""
+async def _fetch_github_query(
+    client: httpx.AsyncClient, query: str, source_label: str
+) -> list[dict]:
+    """Run one GitHub repository search and return the matching repos."""
     repos = []
-    seen: set[str] = set()
-
-    for query, source_label in GITHUB_QUERIES:
-        api_url = (
-            "https://api.github.com/search/repositories"
-            f"?q={urllib.parse.quote(query)}&sort=stars&order=desc&per_page=10"
+    try:
+        resp = await client.get(
+            _GITHUB_SEARCH_URL,
+            params={"q": query, "sort": "stars", "order": "desc", "per_page": 10},
         )
-        req = urllib.request.Request(api_url, headers=_github_headers())
-        try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = json.loads(resp.read())
-            for repo in data.get("items", []):
-                url = repo.get("html_url", "")
-                if not url or url in seen:
-                    continue
-                seen.add(url)
-
-                stars = repo.get("stargazers_count", 0)
-                topics = ", ".join(repo.get("topics", [])[:6])
-                desc = repo.get("description") or ""
-                summary_parts = []
-                if desc:
-                    summary_parts.append(desc)
-                if topics:
-                    summary_parts.append(f"Topics: {topics}")
-                summary_parts.append(f"★ {stars:,} stars")
-
-                repos.append({
-                    "title": repo["full_name"],
-                    "url": url,
-                    "source": source_label,
-                    "category": "GitHub",
-                    "summary": " | ".join(summary_parts),
-                    "published": repo.get("pushed_at") or repo.get("created_at"),
-                })
-        except urllib.error.HTTPError as exc:
-            if exc.code == 403:
-                body = exc.read().decode(errors="ignore")
-                if "rate limit" in body.lower():
-                    print("[github] Rate limit hit. Set GITHUB_TOKEN env var to increase quota.")
-                else:
-                    print(f"[github] 403 Access Denied for '{query}'. Set GITHUB_TOKEN env var.")
-                break  # no point retrying other queries if we're blocked
-            print(f"[github] HTTP {exc.code} for '{query}': {exc}")
-        except Exception as exc:
-            print(f"[github] Error fetching '{query}': {exc}")
+        if resp.status_code == 403:
+            if "rate limit" in resp.text.lower():
+                print(f"[github] Rate limit hit for '{query}'. Set GITHUB_TOKEN env var to increase quota.")
+            else:
+                print(f"[github] 403 Access Denied for '{query}'. Set GITHUB_TOKEN env var.")
+            return repos
+        resp.raise_for_status()
+        for repo in resp.json().get("items", []):
+            url = repo.get("html_url", "")
+            if not url:
+                continue
+
+            stars = repo.get("stargazers_count", 0)
+            topics = ", ".join(repo.get("topics", [])[:6])
+            desc = repo.get("description") or ""
+            summary_parts = []
+            if desc:
+                summary_parts.append(desc)
+            if topics:
+                summary_parts.append(f"Topics: {topics}")
+            summary_parts.append(f"★ {stars:,} stars")
+
+            repos.append({
+                "title": repo["full_name"],
+                "url": url,
+                "source": source_label,
+                "category": "GitHub",
+                "summary": " | ".join(summary_parts),
+                "published": repo.get("pushed_at") or repo.get("created_at"),
+            })
+    except httpx.HTTPStatusError as exc:
+        print(f"[github] HTTP {exc.response.status_code} for '{query}': {exc.response.reason_phrase}")
+    except Exception as exc:
+        print(f"[github] Error fetching '{query}': {exc}")
+    return repos
+
+
+async def _gather_github_queries() -> list[list[dict]]:
+    """Fire every GitHub query at once over one shared HTTP/2 connection."""
+    async with httpx.AsyncClient(
+        http2=True, timeout=_HTTP_TIMEOUT, headers=_github_headers()
+    ) as client:
+        return await asyncio.gather(
+            *(_fetch_github_query(client, q, label) for q, label in GITHUB_QUERIES)
+        )
+
 
-    if repos:
-        insert_articles(repos)
+def collect_github_repos() -> list[dict]:
+    """Search GitHub for trending AI-in-gaming repos and return them."""
+    results = asyncio.run(_gather_github_queries())
 
-    print(f"[github] Processed {len(repos)} unique repos across {len(GITHUB_QUERIES)} queries.")
-    return len(repos)
+    # Queries overlap; repeated URLs are dropped at insert time, where the
+    # first occurrence (and thus its query label) wins.
+    repos = [r for batch in results for r in batch]
+
+    print(f"[github] Processed {len(repos)} results across {len(GITHUB_QUERIES)} queries "
+          f"(repos matching several queries are stored once).")
+    return repos
 
 
 # ---------------------------------------------------------------------------
@@ -216,82 +388,113 @@ ARXIV_QUERIES = [
 ]
 
 _ARXIV_BASE = "https://export.arxiv.org/api/query"
+# arXiv's API terms ask for no more than one request every 3 seconds
+_ARXIV_DELAY = 3
+_ATOM = "{http://www.w3.org/2005/Atom}"
+
 
+def _fetch_arxiv_query(query: str, source_label: str) -> list[dict]:
+    """Run one arXiv API query and return the matching papers.
 
-def fetch_arxiv_papers() -> int:
-    """Query arXiv API for recent papers on relevant topics, insert into DB."""
+    The Atom response is streamed through lxml's iterparse, pulling out only
+    the fields we store and clearing each <entry> once it has been read.
+    """
+    papers = []
+    params = urllib.parse.urlencode({
+        "search_query": query,
+        "sortBy": "submittedDate",
+        "sortOrder": "descending",
+        "max_results": 8,
+    })
+    url = f"{_ARXIV_BASE}?{params}"
+    req = urllib.request.Request(url, headers={"User-Agent": _USER_AGENT})
+    try:
+        with urllib.request.urlopen(req, timeout=_HTTP_TIMEOUT) as resp:
+            data = resp.read()
+        for _, elem in etree.iterparse(
+            BytesIO(data), tag=f"{_ATOM}entry", resolve_entities=False
+        ):
+            # Canonical arXiv URL — strip version suffix (e.g. v1, v2)
+            paper_url = _ARXIV_VERSION_RE.sub("", elem.findtext(f"{_ATOM}id", "").strip())
+            if not paper_url:
+                elem.clear()
+                continue
+
+            title = _clean_html(elem.findtext(f"{_ATOM}title", ""))
+            abstract = _clean_html(elem.findtext(f"{_ATOM}summary", ""))
+            authors = [
+                a.findtext(f"{_ATOM}name", "") for a in elem.iterfind(f"{_ATOM}author")
+            ]
+            published = _iso_date(
+                elem.findtext(f"{_ATOM}published") or elem.findtext(f"{_ATOM}updated")
+            )
+            elem.clear()
+
+            # Prepend up to 3 author names
+            if authors:
+                suffix = " et al." if len(authors) > 3 else ""
+                summary = f"{', '.join(authors[:3])}{suffix} — {abstract}"
+            else:
+                summary = abstract
+
+            papers.append({
+                "title": title,
+                "url": paper_url,
+                "source": source_label,
+                "category": "Research",
+                "summary": summary[:500],
+                "published": published,
+            })
+    except Exception as exc:
+        print(f"[arxiv] Error fetching '{source_label}': {exc}")
+    return papers
+
+
+def collect_arxiv_papers() -> list[dict]:
+    """Query arXiv API for recent papers on relevant topics and return them."""
+    results = []
+    for i, (query, label) in enumerate(ARXIV_QUERIES):
+        if i:
+            time.sleep(_ARXIV_DELAY)
+        results.append(_fetch_arxiv_query(query, label))
+
+    # Papers can match several queries — keep the first label they hit
     papers = []
     seen: set[str] = set()
-
-    for query, source_label in ARXIV_QUERIES:
-        params = urllib.parse.urlencode({
-            "search_query": query,
-            "sortBy": "submittedDate",
-            "sortOrder": "descending",
-            "max_results": 8,
-        })
-        url = f"{_ARXIV_BASE}?{params}"
-        try:
-            parsed = feedparser.parse(url)
-            for entry in parsed.entries:
-                # Canonical arXiv URL — strip version suffix (e.g. v1, v2)
-                paper_url = re.sub(r"v\d+$", "", entry.get("id", "").strip())
-                if not paper_url or paper_url in seen:
-                    continue
-                seen.add(paper_url)
-
-                title = _clean_html(getattr(entry, "title", "").replace("\n", " "))
-                abstract = _clean_html(getattr(entry, "summary", ""))
-
-                # Prepend up to 3 author names
-                author_names = [
-                    a.get("name", "") for a in getattr(entry, "authors", [])[:3]
-                ]
-                if author_names:
-                    suffix = " et al." if len(getattr(entry, "authors", [])) > 3 else ""
-                    summary = f"{', '.join(author_names)}{suffix} — {abstract}"
-                else:
-                    summary = abstract
-
-                papers.append({
-                    "title": title,
-                    "url": paper_url,
-                    "source": source_label,
-                    "category": "Research",
-                    "summary": summary[:500],
-                    "published": _parse_date(entry),
-                })
-        except Exception as exc:
-            print(f"[arxiv] Error fetching '{source_label}': {exc}")
-
-    if papers:
-        insert_articles(papers)
+    for paper in (p for batch in results for p in batch):
+        if paper["url"] in seen:
+            continue
+        seen.add(paper["url"])
+        papers.append(paper)
 
     print(f"[arxiv] Processed {len(papers)} unique papers across {len(ARXIV_QUERIES)} queries.")
-    return len(papers)
+    return papers
 
 
 # ---------------------------------------------------------------------------
 # Tavily — scrape any website (no RSS required)
 # ---------------------------------------------------------------------------
 
-def fetch_tavily_sites(sites: list[dict] | None = None) -> int:
-    """Use Tavily AI search to scrape user-added websites and insert into DB."""
+def collect_tavily_sites(
+    sites: list[dict] | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> list[dict]:
+    """Use Tavily AI search to scrape user-added websites and return results."""
     api_key = os.environ.get("TAVILY_API_KEY", "").strip()
     if not api_key:
         print("[tavily] No TAVILY_API_KEY set — skipping.")
-        return 0
+        return []
 
     try:
         from tavily import TavilyClient
     except ImportError:
         print("[tavily] tavily-python not installed. Run: pip install tavily-python")
-        return 0
+        return []
 
     if sites is None:
-        sites = get_scraped_sites()
+        sites = get_scraped_sites(conn)
     if not sites:
-        return 0
+        return []
 
     client = TavilyClient(api_key=api_key)
     articles = []
@@ -322,8 +525,10 @@ def fetch_tavily_sites(sites: list[dict] | None = None) -> int:
         except Exception as exc:
             print(f"[tavily] Error scraping {site['name']}: {exc}")
 
-    if articles:
-        insert_articles(articles)
-
     print(f"[tavily] Processed {len(articles)} articles from {len(sites)} scraped sites.")
-    return len(articles)
+    return articles
+
+
+def fetch_tavily_sites(sites: list[dict] | None = None) -> int:
+    """Use Tavily AI search to scrape user-added websites and insert into DB."""
+    return _store(collect_tavily_sites(sites))
@@ -66,7 +66,9 @@
     try {
       const res = await fetch(url);
       if (!res.ok) throw new Error(`HTTP ${res.status}`);
-      const articles = await res.json();
+      // Payload is columnar: { cols: [...], rows: [[...], ...] }
+      const { cols, rows } = await res.json();
+      const articles = rows.map(r => Object.fromEntries(cols.map((c, i) => [c, r[i]])));
 
       feed.innerHTML = "";
       if (articles.length === 0) {